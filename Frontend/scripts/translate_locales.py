@@ -1,176 +1,512 @@
-import json
+import asyncio
+import html
 import os
-import time
+import re
 import hashlib
-import subprocess
+import threading
+import orjson
+import pygit2
+import requests
+import deep_translator.google
+from aiolimiter import AsyncLimiter
 from deep_translator import GoogleTranslator
+from deep_translator.exceptions import TooManyRequests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Configuration
 SOURCE_FILE = 'Frontend/src/i18n/locales/en.json'
 LOCALES_DIR = 'Frontend/src/i18n/locales'
 HASHES_FILE = os.path.join(LOCALES_DIR, 'source_hashes.json')
+# Reserved key in HASHES_FILE holding the hash of the whole source file
+FILE_HASH_KEY = '__file__'
+# Reserved key in HASHES_FILE holding lang -> hash of each target locale as last written
+TARGETS_HASH_KEY = '__targets__'
+HASH_DIGEST_SIZE = 8
+MD5_HEX_LENGTH = 32
+TM_FILE_TEMPLATE = os.path.join(LOCALES_DIR, 'tm_{lang}.json')
 TARGET_LANGS = ['fr', 'es', 'de', 'hi']
-BATCH_SIZE = 50
-
-# Global translators cache
-TRANSLATORS = {}
+# Strings are joined into one request per chunk, below the scraper's 5000 character limit
+MAX_CHUNK_CHARS = 4500
+CHUNK_SEPARATOR = '\n@@@SEP@@@\n'
+CHUNK_SEPARATOR_PATTERN = re.compile(r'\s*@@@SEP@@@\s*')
+# i18next interpolations ({{name}}) and <Trans> tags (<1>...</1>)
+PLACEHOLDER_PATTERN = re.compile(r'(\{\{[^}]+\}\}|</?\d+>)')
+# The scraper translates plain text, so placeholders travel as opaque tokens instead of markup
+PLACEHOLDER_TOKEN = '__PH{index}__'
+PLACEHOLDER_TOKEN_PATTERN = re.compile(r'__\s*PH\s*(\d+)\s*__', re.IGNORECASE)
+NO_TRANSLATE_SPAN_PATTERN = re.compile(r'</?span[^>]*>')
+MAX_CONCURRENT_CHUNKS = 4
+# The public endpoint throttles at roughly 5 requests per second
+MAX_REQUESTS_PER_SECOND = 5
+MAX_THROTTLE_RETRIES = 2
+THROTTLE_BACKOFF_SECONDS = 5
+# Google Cloud Translation v3 replaces the scraper when service account credentials are set
+# (requires `pip install google-cloud-translate`)
+CLOUD_PROJECT = os.environ.get('GOOGLE_CLOUD_PROJECT')
+USE_CLOUD_TRANSLATE = bool(os.environ.get('GOOGLE_APPLICATION_CREDENTIALS') and CLOUD_PROJECT)
+
+THROTTLE_ERRORS = (TooManyRequests, requests.exceptions.RetryError)
+if USE_CLOUD_TRANSLATE:
+    from google.api_core.exceptions import TooManyRequests as CloudTooManyRequests
+    from google.cloud import translate_v3
+
+    THROTTLE_ERRORS += (CloudTooManyRequests,)
+
+def create_session():
+    """
+    Returns a keep-alive session that retries throttled and failed requests with backoff.
+    """
+    retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=retries)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+# deep_translator calls requests.get directly; route it through one shared session
+# so TCP/TLS connections are reused across chunks instead of reopened per request
+SESSION = create_session()
+deep_translator.google.requests = SESSION
+
+# Translators cache, per worker thread since a translator keeps per-request state
+THREAD_STATE = threading.local()
+
+# Cloud client is thread-safe and shared; created lazily on first use
+CLOUD_CLIENT = None
+CLOUD_CLIENT_LOCK = threading.Lock()
+
+def get_cloud_client():
+    global CLOUD_CLIENT
+    with CLOUD_CLIENT_LOCK:
+        if CLOUD_CLIENT is None:
+            CLOUD_CLIENT = translate_v3.TranslationServiceClient()
+    return CLOUD_CLIENT
 
 def get_translator(lang):
-    if lang not in TRANSLATORS:
-        TRANSLATORS[lang] = GoogleTranslator(source='en', target=lang)
-    return TRANSLATORS[lang]
+    translators = getattr(THREAD_STATE, 'translators', None)
+    if translators is None:
+        translators = THREAD_STATE.translators = {}
+    if lang not in translators:
+        translators[lang] = GoogleTranslator(source='en', target=lang)
+    return translators[lang]
 
 def load_json(path):
     if not os.path.exists(path):
         return {}
     try:
-        with open(path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except json.JSONDecodeError as e:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    except orjson.JSONDecodeError as e:
         print(f"Error reading {path}: {e}")
         return {}
 
 def save_json(path, data):
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-        f.write('\n')
+    """
+    Writes data as indented JSON unless the file already holds exactly that content.
+    Keeps the existing file's line endings (several locales are committed with CRLF)
+    so an unchanged locale compares equal and a changed one only diffs where it changed.
+    Writes go through a temporary file that then replaces the target, so an
+    interrupted run never leaves a truncated locale behind.
+    Returns whether the file was written.
+    """
+    content = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            existing = f.read()
+        if b'\r\n' in existing:
+            content = content.replace(b'\n', b'\r\n')
+        if existing == content:
+            return False
+
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return True
+
+def format_path(path):
+    """
+    Renders a path of keys/indices in dot notation (e.g. ('a', 'b', 0, 'c') -> "a.b[0].c").
+    """
+    key = ''
+    for part in path:
+        if isinstance(part, int):
+            key += f"[{part}]"
+        elif key:
+            key += f".{part}"
+        else:
+            key = part
+    return key
 
-def flatten_data(data, prefix=''):
+def iter_leaves(data):
     """
-    Flattens a dictionary/list into a single dict of dot-notation keys.
+    Yields (path tuple, value) for every leaf of a dictionary/list in document order.
+    Walks the tree with an explicit stack; list indices are kept as ints.
+    """
+    stack = [(data, ())]
+    while stack:
+        node, path = stack.pop()
+        if isinstance(node, dict):
+            # Push in reverse so keys come out in document order
+            stack.extend((value, path + (key,)) for key, value in reversed(node.items()))
+        elif isinstance(node, list):
+            stack.extend((node[i], path + (i,)) for i in range(len(node) - 1, -1, -1))
+        else:
+            yield path, node
+
+def hash_value(value):
+    """
+    Returns the blake2b hash of a string value.
+    """
+    return hashlib.blake2b(value.encode('utf-8'), digest_size=HASH_DIGEST_SIZE).hexdigest()
+
+def flatten_and_hash(data):
+    """
+    Flattens a dictionary/list into a single dict of path tuples (e.g. ('a', 'b', 0, 'c'))
+    -> (value, hash), hashing each value in the same pass that visits it.
     Compatible with set_nested_value format.
     """
     flat = {}
-    if isinstance(data, dict):
-        for key, value in data.items():
-            full_key = f"{prefix}.{key}" if prefix else key
-            if isinstance(value, (dict, list)):
-                flat.update(flatten_data(value, full_key))
-            else:
-                flat[full_key] = str(value)
-    elif isinstance(data, list):
-        for i, item in enumerate(data):
-            full_key = f"{prefix}[{i}]"
-            if isinstance(item, (dict, list)):
-                flat.update(flatten_data(item, full_key))
-            else:
-                flat[full_key] = str(item)
-    else:
-        # Should be covered by parents, but for safety
-        flat[prefix] = str(data)
+    for path, value in iter_leaves(data):
+        value = str(value)
+        flat[path] = (value, hash_value(value))
     return flat
 
-def get_hashes(flat_data):
+def flatten_keys(data):
+    """
+    Yields only the leaf paths of a dictionary/list, without formatting values.
+    """
+    for path, _ in iter_leaves(data):
+        yield path
+
+def get_hashes(flat_data, algorithm='blake2b'):
+    """
+    Returns a dict of dot-notation key -> hash of value from flatten_and_hash output.
+    md5 is only used to compare against hash files written before the switch to blake2b.
+    """
+    if algorithm == 'md5':
+        return {format_path(k): hashlib.md5(v.encode('utf-8')).hexdigest() for k, (v, _) in flat_data.items()}
+    return {format_path(k): h for k, (_, h) in flat_data.items()}
+
+def get_file_hash(path):
+    """
+    Returns the blake2b hash of a file's raw contents.
     """
-    Returns a dict of key -> md5 hash of value.
+    with open(path, 'rb') as f:
+        return hashlib.blake2b(f.read()).hexdigest()
+
+def get_target_hashes():
+    """
+    Returns lang -> file hash for every target locale that exists.
     """
     hashes = {}
-    for k, v in flat_data.items():
-        hashes[k] = hashlib.md5(v.encode('utf-8')).hexdigest()
+    for lang in TARGET_LANGS:
+        target_file = os.path.join(LOCALES_DIR, f"{lang}.json")
+        if os.path.exists(target_file):
+            hashes[lang] = get_file_hash(target_file)
     return hashes
 
+def is_up_to_date(file_hash, old_hashes):
+    """
+    True when the source file is unchanged since the last run and every target
+    locale still has the content recorded when the hashes were written.
+    Compares content rather than mtimes, which a fresh checkout resets.
+    """
+    if old_hashes.get(FILE_HASH_KEY) != file_hash:
+        return False
+    stored = old_hashes.get(TARGETS_HASH_KEY)
+    return stored is not None and len(stored) == len(TARGET_LANGS) and stored == get_target_hashes()
+
+def get_tm_key(text):
+    """
+    Returns the translation memory key for a source string.
+    """
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
 def get_git_old_content(path, revision='HEAD~1'):
     """
     Tries to fetch the content of the file from a previous git revision.
     """
     # Convert path to posix for git if needed (Windows accepts / too)
     git_path = path.replace('\\', '/')
-    cmd = ['git', 'show', f'{revision}:{git_path}']
     try:
-        # Run command gracefully
-        result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8')
-        if result.returncode == 0:
-            return json.loads(result.stdout)
+        # Read the blob in-process instead of spawning `git show`
+        repo = pygit2.Repository('.')
+        blob = repo.revparse_single(f'{revision}:{git_path}')
+        return orjson.loads(blob.data)
+    except KeyError:
+        # Revision or path doesn't exist (e.g. shallow clone or new file)
+        pass
     except Exception as e:
         # Don't crash if git is missing or fails
         print(f"  [Info] Git fallback failed (this is normal if no git history): {e}")
     return None
 
-def set_nested_value(data, key_path, value):
+def set_nested_value(data, path, value):
     """
-    Sets a value in a nested dict/list using dot notation (e.g. "a.b[0].c")
+    Sets a value in a nested dict/list using a path tuple from flatten_and_hash (e.g. ('a', 'b', 0, 'c'))
     Autocreates intermediate dicts/lists if missing.
     """
-    parts = []
-    current_part = ""
-    for char in key_path:
-        if char == '.':
-            if current_part: parts.append(current_part)
-            current_part = ""
-        elif char == '[':
-            if current_part: parts.append(current_part)
-            current_part = ""
-        elif char == ']':
-            pass
-        else:
-            current_part += char
-    if current_part: parts.append(current_part)
-
     current = data
-    for i, part in enumerate(parts[:-1]):
-        next_part = parts[i+1]
-        next_is_idx = next_part.isdigit()
-
-        if part.isdigit():
-            part_idx = int(part)
-            while len(current) <= part_idx:
-                current.append({})
-
-            # Type check correction if needed could happen here
-            current = current[part_idx]
+    for part, next_part in zip(path, path[1:]):
+        new_container = list if isinstance(next_part, int) else dict
+        if isinstance(part, int):
+            while len(current) <= part:
+                current.append(new_container())
+            current = current[part]
         else:
             if part not in current:
-                current[part] = [] if next_is_idx else {}
+                current[part] = new_container()
             current = current[part]
 
     # Set final value
-    last_part = parts[-1]
-    if last_part.isdigit():
-        idx = int(last_part)
-        while len(current) <= idx:
+    last_part = path[-1]
+    if isinstance(last_part, int):
+        while len(current) <= last_part:
             current.append(None)
-        current[idx] = value
+    current[last_part] = value
+
+def protect_placeholders(text):
+    """
+    Prepares a text so its placeholders come back untranslated.
+    Cloud Translation is sent HTML, so placeholders are wrapped in <span translate="no">
+    and the rest is escaped; the scraper gets plain text with each placeholder
+    swapped for an opaque token.
+    Returns (protected text, placeholders).
+    """
+    parts = PLACEHOLDER_PATTERN.split(text)
+    placeholders = parts[1::2]
+    if USE_CLOUD_TRANSLATE:
+        protected = ''.join(
+            f'<span translate="no">{html.escape(part, quote=False)}</span>' if i % 2 else html.escape(part, quote=False)
+            for i, part in enumerate(parts)
+        )
     else:
-        current[last_part] = value
+        protected = ''.join(
+            PLACEHOLDER_TOKEN.format(index=i // 2) if i % 2 else part
+            for i, part in enumerate(parts)
+        )
+    return protected, placeholders
 
-def batch_translate(texts, target_lang):
+def restore_placeholders(text, placeholders):
+    """
+    Reverses protect_placeholders on a translated text.
+    Returns None if the scraper dropped or duplicated a token, so the string is
+    treated as untranslated rather than saved with a broken placeholder.
     """
-    Translates a list of texts in batches.
+    if USE_CLOUD_TRANSLATE:
+        return html.unescape(NO_TRANSLATE_SPAN_PATTERN.sub('', text))
+
+    found = []
+    def put_back(match):
+        index = int(match.group(1))
+        found.append(index)
+        return placeholders[index] if index < len(placeholders) else match.group(0)
+
+    restored = PLACEHOLDER_TOKEN_PATTERN.sub(put_back, text)
+    if sorted(found) != list(range(len(placeholders))):
+        return None
+    return restored
+
+def pack_chunks(texts):
+    """
+    Greedily groups texts so that each joined chunk stays within MAX_CHUNK_CHARS,
+    measured after placeholder protection since that is what gets sent.
+    """
+    chunks = []
+    current = []
+    size = 0
+    for text in texts:
+        length = len(protect_placeholders(text)[0])
+        added = length + (len(CHUNK_SEPARATOR) if current else 0)
+        if current and size + added > MAX_CHUNK_CHARS:
+            chunks.append(current)
+            current = []
+            added = length
+            size = 0
+        current.append(text)
+        size += added
+    if current:
+        chunks.append(current)
+    return chunks
+
+def translate_chunk(texts, target_lang):
+    """
+    Translates a chunk of texts with a single request.
+    Cloud Translation takes the texts as a list; the scraper gets them joined with a
+    separator. Returns None if the separators don't survive so the caller can resend
+    each text on its own.
+    """
+    protected, placeholders = zip(*(protect_placeholders(text) for text in texts))
+
+    if USE_CLOUD_TRANSLATE:
+        response = get_cloud_client().translate_text(
+            parent=f"projects/{CLOUD_PROJECT}/locations/global",
+            contents=list(protected),
+            mime_type='text/html',
+            source_language_code='en',
+            target_language_code=target_lang,
+        )
+        parts = [t.translated_text for t in response.translations]
+    else:
+        translator = get_translator(target_lang)
+        translated = translator.translate(CHUNK_SEPARATOR.join(protected))
+        parts = CHUNK_SEPARATOR_PATTERN.split(translated) if translated else []
+        if len(parts) != len(protected):
+            return None
+    return [restore_placeholders(part, kept) for part, kept in zip(parts, placeholders)]
+
+async def batch_translate(texts, target_lang, semaphore, limiter):
+    """
+    Translates a list of texts in chunks, yielding (chunk, translations) as each chunk completes.
+    Translations of a failed chunk are None so callers can tell them apart.
+    The blocking scraper calls run in worker threads so chunks and languages overlap;
+    the shared semaphore bounds how many chunks are in flight at once and the shared
+    limiter how many start per second. Throttled chunks back off exponentially and retry.
     """
     if not texts:
-        return []
+        return
 
-    translator = get_translator(target_lang)
-    translated = []
+    chunks = pack_chunks(texts)
+    print(f"  [{target_lang}] Translating {len(texts)} strings in {len(chunks)} chunks...")
+
+    async def run(index, chunk):
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            try:
+                async with limiter, semaphore:
+                    results = await asyncio.to_thread(translate_chunk, chunk, target_lang)
+                if results is None and len(chunk) > 1:
+                    # Separators got mangled; resend each text as its own chunk under the same limits
+                    print(f"    [{target_lang}] Chunk {index + 1} came back misaligned, retrying per string...")
+                    singles = await asyncio.gather(*(run(index, [text]) for text in chunk))
+                    return chunk, [translated for _, (translated,) in singles]
+                if results is None:
+                    break
+                print(f"    [{target_lang}] Chunk {index + 1} done")
+                return chunk, results
+            except THROTTLE_ERRORS as e:
+                # The session already honoured Retry-After; wait longer before trying again
+                if attempt == MAX_THROTTLE_RETRIES:
+                    print(f"    [{target_lang}] Chunk {index + 1} still throttled: {e}. Skipping chunk.")
+                    break
+                delay = THROTTLE_BACKOFF_SECONDS * 2 ** attempt
+                print(f"    [{target_lang}] Chunk {index + 1} throttled, retrying in {delay}s...")
+                await asyncio.sleep(delay)
+            except Exception as e:
+                print(f"    [{target_lang}] Error in chunk {index + 1}: {e}. Skipping chunk.")
+                break
+        return chunk, [None] * len(chunk)
+
+    for next_done in asyncio.as_completed([run(i, chunk) for i, chunk in enumerate(chunks)]):
+        yield await next_done
+
+def compute_missing_for_lang(lang, flat_source, changed_keys):
+    """
+    Loads a target locale and works out which source keys need translating.
+    Returns (lang, target_data, keys_to_translate, missing_count).
+    """
+    target_file = os.path.join(LOCALES_DIR, f"{lang}.json")
+    target_data = load_json(target_file)
+    target_keys = frozenset(flatten_keys(target_data))
+
+    # 1. Missing Keys (in source but not in target)
+    missing_keys = [k for k in flat_source if k not in target_keys]
+
+    # 2. Changed Keys (content changed)
+    # We process changed keys even if they exist in target
+    keys_to_translate = list(set(missing_keys) | changed_keys)
+
+    return lang, target_data, keys_to_translate, len(missing_keys)
+
+async def process_lang(lang, target_data, keys_to_translate, flat_source, semaphore, limiter):
+    target_file = os.path.join(LOCALES_DIR, f"{lang}.json")
+
+    # Send each distinct string once; repeated labels share the result
+    keys_by_text = {}
+    for key in keys_to_translate:
+        keys_by_text.setdefault(flat_source[key][0], []).append(key)
+
+    # Reuse earlier translations of the same source string from the translation memory
+    tm_file = TM_FILE_TEMPLATE.format(lang=lang)
+    tm = load_json(tm_file)
+    misses = []
+    for text, keys in keys_by_text.items():
+        hit = tm.get(get_tm_key(text))
+        if hit is None:
+            misses.append(text)
+            continue
+        for key in keys:
+            set_nested_value(target_data, key, hit)
+
+    if len(misses) < len(keys_by_text):
+        print(f"  [{lang}] Reusing {len(keys_by_text) - len(misses)} strings from translation memory.")
+
+    # Apply each chunk as it lands so the updates overlap the requests still in flight
+    learned = 0
+    async for chunk, results in batch_translate(misses, lang, semaphore, limiter):
+        for text, translated in zip(chunk, results):
+            if translated is None:
+                translated = text # Fallback to original
+            else:
+                tm[get_tm_key(text)] = translated
+                learned += 1
+            for key in keys_by_text[text]:
+                set_nested_value(target_data, key, translated)
 
-    print(f"  Translating {len(texts)} strings in batches of {BATCH_SIZE}...")
+    print(f"  Saving updates to {target_file}")
+    save_json(target_file, target_data)
 
-    for i in range(0, len(texts), BATCH_SIZE):
-        batch = texts[i:i + BATCH_SIZE]
-        try:
-            results = translator.translate_batch(batch)
-            translated.extend(results)
-            print(f"    Batch {i//BATCH_SIZE + 1} done")
-            time.sleep(1) # Be nice to the scraper
-        except Exception as e:
-            print(f"    Error in batch {i}: {e}. Skipping batch.")
-            translated.extend(batch) # Fallback to original
+    if learned:
+        save_json(tm_file, tm)
 
-    return translated
+async def translate_all(prepared, flat_source, changed_keys):
+    """
+    Runs every target language that needs updates concurrently.
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_CHUNKS)
+    limiter = AsyncLimiter(MAX_REQUESTS_PER_SECOND, 1)
+    jobs = []
+    for lang, target_data, keys_to_translate, missing_count in prepared:
+        print(f"Processing {lang}...")
+        if not keys_to_translate:
+            print(f"  No updates needed for {lang}.")
+            continue
+        print(f"  [{lang}] Updating {len(keys_to_translate)} keys ({missing_count} missing, {len(changed_keys)} changed/stale)...")
+        jobs.append(process_lang(lang, target_data, keys_to_translate, flat_source, semaphore, limiter))
+    await asyncio.gather(*jobs)
 
 def main():
     print(f"Loading source: {SOURCE_FILE}")
+    if not os.path.exists(SOURCE_FILE):
+        print("Source file missing!")
+        return
+
+    file_hash = get_file_hash(SOURCE_FILE)
+    old_hashes = load_json(HASHES_FILE)
+    if is_up_to_date(file_hash, old_hashes):
+        print("All locales are up to date.")
+        return
+
     source_data = load_json(SOURCE_FILE)
     if not source_data:
         print("Source file empty or missing!")
         return
 
-    flat_source = flatten_data(source_data)
+    # Flattened and hashed once, then shared by every target language
+    flat_source = flatten_and_hash(source_data)
     current_hashes = get_hashes(flat_source)
+    source_paths = {format_path(path): path for path in flat_source}
 
     # Check for changes
     changed_keys = set()
-    old_hashes = load_json(HASHES_FILE)
+    old_hashes.pop(FILE_HASH_KEY, None)
+    old_hashes.pop(TARGETS_HASH_KEY, None)
 
     if not old_hashes:
         print("  No existing hash file found. Attempting to detect recent changes via Git...")
@@ -178,7 +514,7 @@ def main():
         old_content = get_git_old_content(SOURCE_FILE)
         if old_content:
             print("  Git history found. Comparing with HEAD~1...")
-            flat_old = flatten_data(old_content)
+            flat_old = flatten_and_hash(old_content)
             old_hashes = get_hashes(flat_old)
         else:
             print("  Could not retrieve old version from Git. Assuming initial sync (only truly missing keys will be added).")
@@ -186,48 +522,28 @@ def main():
 
     # Identify changed keys
     if old_hashes:
-        for k, h in current_hashes.items():
-            if k in old_hashes and old_hashes[k] != h:
-                changed_keys.add(k)
+        compare_hashes = current_hashes
+        if len(next(iter(old_hashes.values()))) == MD5_HEX_LENGTH:
+            # Hash file predates the switch to blake2b, compare in its format
+            compare_hashes = get_hashes(flat_source, 'md5')
+        # Items views support set operations, so the diff runs in C rather than a Python loop
+        changed_keys = {
+            source_paths[k] for k, _ in compare_hashes.items() - old_hashes.items()
+            if k in old_hashes
+        }
 
     if changed_keys:
         print(f"  Detected {len(changed_keys)} changed source keys (based on hash comparison).")
     else:
         print("  No changed keys detected.")
 
-    for lang in TARGET_LANGS:
-        target_file = os.path.join(LOCALES_DIR, f"{lang}.json")
-        print(f"Processing {lang}...")
-        target_data = load_json(target_file)
-        flat_target = flatten_data(target_data)
-
-        # 1. Missing Keys (in source but not in target)
-        missing_keys = [k for k in flat_source if k not in flat_target]
-
-        # 2. Changed Keys (content changed)
-        # We process changed keys even if they exist in target
-        keys_to_translate = list(set(missing_keys) | changed_keys)
-
-        if not keys_to_translate:
-            print(f"  No updates needed for {lang}.")
-            continue
-
-        print(f"  Updating {len(keys_to_translate)} keys ({len(missing_keys)} missing, {len(changed_keys)} changed/stale)...")
-
-        # Prepare text list (order matters for batch_translate)
-        texts_to_translate = [flat_source[k] for k in keys_to_translate]
-
-        translated_texts = batch_translate(texts_to_translate, lang)
-
-        # Apply updates
-        for key, text in zip(keys_to_translate, translated_texts):
-            set_nested_value(target_data, key, text)
+    prepared = [compute_missing_for_lang(lang, flat_source, changed_keys) for lang in TARGET_LANGS]
 
-        print(f"  Saving updates to {target_file}")
-        save_json(target_file, target_data)
+    print(f"Translating with {'Google Cloud Translation' if USE_CLOUD_TRANSLATE else 'deep-translator'}")
+    asyncio.run(translate_all(prepared, flat_source, changed_keys))
 
     print(f"Updating source hashes to {HASHES_FILE}")
-    save_json(HASHES_FILE, current_hashes)
+    save_json(HASHES_FILE, {FILE_HASH_KEY: file_hash, TARGETS_HASH_KEY: get_target_hashes(), **current_hashes})
 
 if __name__ == "__main__":
     main()